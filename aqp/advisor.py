@@ -0,0 +1,273 @@
+from __future__ import annotations
+import gzip
+import io
+import math
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from .sampling import uniform_sample_df
+
+# smallest rate the advisor will ever recommend
+MIN_RATE = 0.001
+
+# E|X| = sqrt(2/pi) * sigma for a normal error, matching the benchmark's mean relative error
+_MEAN_ABS = math.sqrt(2.0 / math.pi)
+
+
+@dataclass
+class Pilot:
+    text: Optional[bytes]         # raw CSV bytes (header + whole lines), None for parquet
+    frame: pd.DataFrame           # pilot rows, all columns
+    fraction: float               # share of the source the pilot covers
+    rows_est: float               # estimated rows in the full source
+
+
+@dataclass
+class CostModel:
+    rows: float                   # estimated rows in the source
+    scan_rps: float               # full-column load used by exact / sample
+    stream_rps: Optional[float]   # typed usecols chunked read used by stream (CSV only)
+    sample_rps: float             # DataFrame.sample throughput
+    agg_rps: float                # WHERE + GROUP BY throughput on loaded rows
+    prefilter_rps: Optional[float] = None  # WHERE over every loaded row before sampling (sample, no JOIN)
+
+    def estimate(self, method: str, p: float = 1.0) -> float:
+        n = self.rows
+        if method == "exact":
+            return n / self.scan_rps + n / self.agg_rps
+        if method == "sample":
+            prefilter = n / self.prefilter_rps if self.prefilter_rps else 0.0
+            return n / self.scan_rps + prefilter + n / self.sample_rps + p * n / self.agg_rps
+        if method == "stream":
+            return n / self.stream_rps + p * n / self.agg_rps
+        raise ValueError("Unknown method: " + method)
+
+    def max_rate(self, method: str, budget: float) -> float:
+        fixed = self.estimate(method, 0.0)
+        per_rate = self.rows / self.agg_rps
+        return (budget - fixed) / per_rate if per_rate > 0 else 1.0
+
+
+@dataclass
+class Advice:
+    method: str
+    sample_rate: float
+    est_time_sec: float
+    est_rel_error: float
+    feasible: bool
+    rows_est: float
+    candidates: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def draw_pilot(path: str, pilot_bytes: int = 2 << 20, blocks: int = 32, seed: Optional[int] = None) -> Pilot:
+    p = Path(path)
+    suffixes = [s.lower() for s in p.suffixes]
+    if suffixes and suffixes[-1] == ".parquet":
+        return _pilot_parquet(path, pilot_bytes, seed)
+    if suffixes and suffixes[-1] == ".gz":
+        return _pilot_csv_prefix(path, pilot_bytes)
+    return _pilot_csv_blocks(path, pilot_bytes, blocks, seed)
+
+
+def _pilot_csv_blocks(path: str, pilot_bytes: int, blocks: int, seed: Optional[int]) -> Pilot:
+    # seek to random offsets and keep the whole lines inside each block,
+    # so the pilot is spread over the file without scanning it
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body = size - len(header)
+        block = max(pilot_bytes // blocks, 1)
+        if body <= pilot_bytes:
+            data = f.read()
+            return _make_pilot(header, data, 1.0)
+
+        rng = np.random.default_rng(seed)
+        starts = np.sort(rng.choice(body // block, size=blocks, replace=False)) * block + len(header)
+        lines = []
+        covered = 0
+        for off in starts:
+            f.seek(int(off))
+            f.readline()  # drop the partial line we landed in
+            chunk = f.read(block)
+            cut = chunk.rfind(b"\n")
+            if cut < 0:
+                continue
+            chunk = chunk[:cut + 1]
+            lines.append(chunk)
+            covered += len(chunk)
+    return _make_pilot(header, b"".join(lines), covered / body)
+
+
+def _pilot_csv_prefix(path: str, pilot_bytes: int) -> Pilot:
+    size = os.path.getsize(path)
+    with open(path, "rb") as raw, gzip.GzipFile(fileobj=raw) as f:
+        header = f.readline()
+        data = f.read(pilot_bytes)
+        cut = data.rfind(b"\n")
+        data = data[:cut + 1] if cut >= 0 else b""
+        done = not f.read(1)
+        fraction = 1.0 if done else min(raw.tell() / max(size, 1), 1.0)
+    return _make_pilot(header, data, fraction)
+
+
+def _make_pilot(header: bytes, data: bytes, fraction: float) -> Pilot:
+    text = header + data
+    frame = pd.read_csv(io.BytesIO(text))
+    fraction = max(fraction, 1e-12)
+    return Pilot(text=text, frame=frame, fraction=fraction, rows_est=len(frame) / fraction)
+
+
+def _pilot_parquet(path: str, pilot_bytes: int, seed: Optional[int]) -> Pilot:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    total = pf.metadata.num_rows
+    groups = pf.metadata.num_row_groups
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(groups)
+    tables, rows, nbytes = [], 0, 0
+    for i in order:
+        t = pf.read_row_group(int(i))
+        tables.append(t)
+        rows += t.num_rows
+        nbytes += t.nbytes
+        if nbytes >= pilot_bytes:
+            break
+    frame = pd.concat([t.to_pandas() for t in tables], ignore_index=True) if tables else pd.DataFrame()
+    fraction = max(rows / max(total, 1), 1e-12)
+    return Pilot(text=None, frame=frame, fraction=fraction, rows_est=float(total))
+
+
+def calibrate(pilot: Pilot, q, engine, repeats: int = 3) -> CostModel:
+    usecols = engine._needed_columns(q)
+    dtypes = engine._stream_dtypes(q, usecols)
+    n = max(len(pilot.frame), 1)
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return max(min(times), 1e-9)
+
+    if pilot.text is not None:
+        scan = best(lambda: pd.read_csv(io.BytesIO(pilot.text)))
+        stream = best(lambda: pd.read_csv(io.BytesIO(pilot.text), usecols=usecols, dtype=dtypes,
+                                          low_memory=False, engine="c"))
+        stream_rps = n / stream
+    else:
+        buf = io.BytesIO()
+        pilot.frame.to_parquet(buf)
+        raw = buf.getvalue()
+        scan = best(lambda: pd.read_parquet(io.BytesIO(raw)))
+        stream_rps = None
+
+    sample = best(lambda: uniform_sample_df(pilot.frame, 0.5, 0))
+    agg = best(lambda: engine._aggregate(engine._apply_where(engine._join(pilot.frame, q), q), q))
+    # without a JOIN the sample method filters the whole frame before sampling
+    prefilter_rps = None
+    if q.where_col and not q.join_source:
+        prefilter_rps = n / best(lambda: engine._apply_where(pilot.frame, q))
+    return CostModel(rows=pilot.rows_est, scan_rps=n / scan, stream_rps=stream_rps,
+                     sample_rps=n / sample, agg_rps=n / agg, prefilter_rps=prefilter_rps)
+
+
+def error_constant(pilot: Pilot, q, engine) -> float:
+    """K such that the expected mean relative error at rate p is K * sqrt((1-p)/p).
+
+    Uses the Bernoulli-sampling variance of the scaled estimators, with
+    per-group sums, squares and counts extrapolated from the pilot.
+    """
+    df = engine._apply_where(engine._join(pilot.frame, q), q)
+    if df.empty:
+        return math.inf
+    f = pilot.fraction
+    agg = q.agg
+    col = q.agg_col
+    by = q.group_by or q.select_cols
+
+    if agg.startswith("COUNT"):
+        n = df.groupby(by, dropna=False).size() if by else pd.Series([len(df)])
+        c = np.sqrt(f / n.astype("float64"))
+    else:
+        y = df[col].astype("float64")
+        if agg.startswith("SUM"):
+            stats = pd.DataFrame({"s": y, "s2": y * y})
+            g = stats.groupby([df[b] for b in by], dropna=False).sum() if by else stats.sum().to_frame().T
+            c = np.sqrt(f) * np.sqrt(g["s2"]) / g["s"].abs()
+        else:
+            g = y.groupby([df[b] for b in by], dropna=False) if by else y.groupby(np.zeros(len(y)))
+            stats = g.agg(["mean", "std", "count"])
+            c = np.sqrt(f / stats["count"]) * stats["std"].fillna(0.0) / stats["mean"].abs()
+    c = c.replace([np.inf, -np.inf], np.nan).dropna()
+    if c.empty:
+        return math.inf
+    return _MEAN_ABS * float(c.mean())
+
+
+def rate_for_error(k: float, target: float) -> float:
+    if k <= 0:
+        return MIN_RATE
+    if not math.isfinite(k) or target <= 0:
+        return 1.0
+    return min(max(1.0 / (1.0 + (target / k) ** 2), MIN_RATE), 1.0)
+
+
+def error_at_rate(k: float, p: float) -> float:
+    if p >= 1.0:
+        return 0.0
+    return k * math.sqrt((1.0 - p) / p) if math.isfinite(k) else math.inf
+
+
+def recommend(
+    q,
+    engine,
+    latency_budget: Optional[float] = None,
+    error_target: Optional[float] = None,
+    seed: Optional[int] = None,
+    pilot_bytes: int = 2 << 20,
+) -> Advice:
+    if latency_budget is None and error_target is None:
+        raise ValueError("Give a latency_budget (seconds) and/or an error_target (relative error)")
+
+    pilot = draw_pilot(q.source, pilot_bytes=pilot_bytes, seed=seed)
+    cost = calibrate(pilot, q, engine)
+    k = error_constant(pilot, q, engine)
+
+    methods = ["stream", "sample"] if cost.stream_rps is not None else ["sample"]
+    candidates = [{"method": "exact", "sample_rate": 1.0,
+                   "est_time_sec": cost.estimate("exact"), "est_rel_error": 0.0}]
+    for m in methods:
+        if error_target is not None:
+            p = rate_for_error(k, error_target)
+        else:
+            p = min(max(cost.max_rate(m, latency_budget), MIN_RATE), 1.0)
+        candidates.append({"method": m, "sample_rate": p,
+                           "est_time_sec": cost.estimate(m, p), "est_rel_error": error_at_rate(k, p)})
+
+    def ok(c) -> bool:
+        return ((latency_budget is None or c["est_time_sec"] <= latency_budget)
+                and (error_target is None or c["est_rel_error"] <= error_target))
+
+    feasible = [c for c in candidates if ok(c)]
+    if feasible:
+        # prefer the most accurate plan when only a budget is set, otherwise the fastest
+        key = (lambda c: (c["est_rel_error"], c["est_time_sec"])) if error_target is None \
+            else (lambda c: (c["est_time_sec"], c["est_rel_error"]))
+        best = min(feasible, key=key)
+    else:
+        best = min(candidates, key=lambda c: c["est_time_sec"])
+
+    return Advice(method=best["method"], sample_rate=best["sample_rate"],
+                  est_time_sec=best["est_time_sec"], est_rel_error=best["est_rel_error"],
+                  feasible=bool(feasible), rows_est=cost.rows, candidates=candidates)
@@ -7,6 +7,8 @@ def main():
     ap.add_argument('--query', required=True, help='SQL-like query (must reference the same path)')
     ap.add_argument('--rates', nargs='+', type=float, default=[0.05,0.1,0.2,0.4,0.8])
     ap.add_argument('--seed', type=int, default=42)
+    ap.add_argument('--error_target', type=float, default=None, help='Also report the advisor pick for this error')
+    ap.add_argument('--latency_budget', type=float, default=None, help='Also report the advisor pick for this budget (sec)')
     args = ap.parse_args()
 
     eng = QueryEngine()
@@ -24,11 +26,15 @@ def main():
         err = rel_error(exact_res, approx)
         logs.append({'rate': r, 'time_sec': t, 'rel_error': err})
 
-    print(json.dumps({
+    report = {
         'exact_time_sec': exact_time,
         'exact_rows': exact_res,
         'runs': logs
-    }, indent=2))
+    }
+    if args.error_target is not None or args.latency_budget is not None:
+        report['advice'] = eng.advise(args.query, latency_budget=args.latency_budget,
+                                      error_target=args.error_target, seed=args.seed)
+    print(json.dumps(report, indent=2))
 
 def rel_error(exact, approx):
     
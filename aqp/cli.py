@@ -1,20 +1,45 @@
-import argparse, json, time
+import argparse, json, sys, time
 from .engine import QueryEngine
+from .output import FORMATS, write_result
 
 def main():
     ap = argparse.ArgumentParser(description="AQP Engine CLI")
     ap.add_argument('--query', required=True, help='SQL-like query')
-    ap.add_argument('--method', default='sample', choices=['sample','stream','exact'])
+    ap.add_argument('--method', default='sample', choices=['sample','stream','exact','auto'])
     ap.add_argument('--sample_rate', type=float, default=0.1)
     ap.add_argument('--seed', type=int, default=42)
-    ap.add_argument('--stream_k', type=int, default=10000)
+    ap.add_argument('--chunksize', type=int, default=1_000_000, help='Rows per chunk for the stream method')
     ap.add_argument('--show_exact', action='store_true', help='Also compute exact for comparison')
+    ap.add_argument('--latency_budget', type=float, default=None, help='Seconds; used by --method auto / --advise')
+    ap.add_argument('--error_target', type=float, default=None, help='Mean relative error; used by --method auto / --advise')
+    ap.add_argument('--advise', action='store_true', help='Only print the recommended method and rate')
+    ap.add_argument('--format', default='json', choices=list(FORMATS),
+                    help='json prints the full envelope; ndjson/csv/arrow stream result rows')
+    ap.add_argument('--output', default=None, help='Write rows here instead of stdout (ndjson/csv/arrow)')
     args = ap.parse_args()
+    if (args.advise or args.method == 'auto') and args.latency_budget is None and args.error_target is None:
+        ap.error('--advise and --method auto need --latency_budget and/or --error_target')
 
     eng = QueryEngine()
+    if args.advise:
+        print(json.dumps(eng.advise(args.query, latency_budget=args.latency_budget,
+                                    error_target=args.error_target, seed=args.seed), indent=2))
+        return
     out = eng.run(args.query, method=args.method, sample_rate=args.sample_rate, seed=args.seed,
-                  streaming_k=args.stream_k, return_exact=args.show_exact)
-    print(json.dumps(out, indent=2))
+                  streaming_chunksize=args.chunksize, return_exact=args.show_exact,
+                  as_frame=(args.format != 'json'),
+                  latency_budget=args.latency_budget, error_target=args.error_target)
+    if args.format == 'json':
+        print(json.dumps(out, indent=2))
+        return
+
+    write_result(out['result'], args.format, args.output)
+    meta = {"mode": out["mode"], "time_sec": out["time_sec"], "rows": len(out["result"])}
+    if "advice" in out:
+        meta["advice"] = {k: out["advice"][k] for k in ("method", "sample_rate", "est_time_sec", "est_rel_error")}
+    if "exact" in out:
+        meta["exact"] = {"time_sec": out["exact"]["time_sec"], "rows": len(out["exact"]["result"])}
+    print(json.dumps(meta), file=sys.stderr)
 
 if __name__ == '__main__':
     main()
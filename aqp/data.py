@@ -12,3 +12,11 @@ def load_csv(path: str, columns=None):
 
     
     return pd.read_csv(path, usecols=columns)
+
+def read_columns(path: str) -> list[str]:
+    
+    if Path(path).suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+
+    return list(pd.read_csv(path, nrows=0).columns)
@@ -1,12 +1,16 @@
 from __future__ import annotations 
+import re
 import time
 from typing import Optional, Dict, Any
 import pandas as pd
 import numpy as np
+from pandas.api.types import is_numeric_dtype
 
 from .parser import parse
 from .sampling import uniform_sample_df
-from .data import load_csv
+from .data import load_csv, read_columns
+from .advisor import recommend
+from .join import DimIndex, dim_index
 
 
 class QueryEngine:
@@ -21,39 +25,68 @@ class QueryEngine:
         sample_rate: float = 0.1,           
         seed: Optional[int] = None,
         streaming_chunksize: int = 1_000_000,
-        return_exact: bool = False
+        return_exact: bool = False,
+        as_frame: bool = False,
+        latency_budget: Optional[float] = None,
+        error_target: Optional[float] = None
     ) -> Dict[str, Any]:
         q = parse(sql)
+
+        if method == "auto":
+            at0 = time.time()
+            advice = recommend(q, self, latency_budget=latency_budget, error_target=error_target, seed=seed)
+            out = self.run(sql, method=advice.method, sample_rate=advice.sample_rate, seed=seed,
+                           streaming_chunksize=streaming_chunksize, return_exact=return_exact, as_frame=as_frame)
+            out["advice"] = advice.to_dict() | {"time_sec": time.time() - at0 - out["time_sec"]}
+            return out
+
         t0 = time.time()
 
         if method == "exact":
             exact = self._run_exact(q)
-            return {"mode": "exact", "time_sec": time.time() - t0, "result": exact}
+            return {"mode": "exact", "time_sec": time.time() - t0, "result": _materialize(exact, as_frame)}
 
         if method == "sample":
             
             df_full = load_csv(q.source)
-            df_full = self._apply_where(df_full, q)
-            df_samp = uniform_sample_df(df_full, sample_rate, seed)
+            if q.join_source:
+                # sample the fact rows first so only the kept ones probe the index
+                df_samp = uniform_sample_df(df_full, sample_rate, seed)
+                df_samp = self._apply_where(self._join(df_samp, q), q)
+            else:
+                df_full = self._apply_where(df_full, q)
+                df_samp = uniform_sample_df(df_full, sample_rate, seed)
             res = self._aggregate(df_samp, q, scale=(1.0 / max(sample_rate, 1e-12)))
-            out = {"mode": "sample", "time_sec": time.time() - t0, "result": res}
+            res = self._order_limit(res, q)
+            out = {"mode": "sample", "time_sec": time.time() - t0, "result": _materialize(res, as_frame)}
             if return_exact:
                 et0 = time.time()
                 exact = self._run_exact(q)
-                out["exact"] = {"time_sec": time.time() - et0, "result": exact}
+                out["exact"] = {"time_sec": time.time() - et0, "result": _materialize(exact, as_frame)}
             return out
 
         if method == "stream":
             res = self._stream_approx(q, p=sample_rate, seed=seed, chunksize=streaming_chunksize)
-            out = {"mode": "stream", "time_sec": time.time() - t0, "result": res}
+            res = self._order_limit(res, q)
+            out = {"mode": "stream", "time_sec": time.time() - t0, "result": _materialize(res, as_frame)}
             if return_exact:
                 et0 = time.time()
                 exact = self._run_exact(q)
-                out["exact"] = {"time_sec": time.time() - et0, "result": exact}
+                out["exact"] = {"time_sec": time.time() - et0, "result": _materialize(exact, as_frame)}
             return out
 
         raise ValueError("Unknown method: " + method)
 
+    def advise(
+        self,
+        sql: str,
+        latency_budget: Optional[float] = None,
+        error_target: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return recommend(parse(sql), self, latency_budget=latency_budget,
+                         error_target=error_target, seed=seed).to_dict()
+
     
 
     def _apply_where(self, df: pd.DataFrame, q):
@@ -71,48 +104,55 @@ class QueryEngine:
             if op == '<=': return df[df[q.where_col] <= v]
         return df
 
-    def _aggregate(self, df: pd.DataFrame, q, scale: float = 1.0):
+    def _join_index(self, q) -> DimIndex | None:
+        if not q.join_source:
+            return None
+        return dim_index(q.join_source, q.join_key)
+
+    def _join(self, df: pd.DataFrame, q) -> pd.DataFrame:
+        index = self._join_index(q)
+        return df if index is None else index.probe(df, q.join_key)
+
+    def _aggregate(self, df: pd.DataFrame, q, scale: float = 1.0) -> pd.DataFrame:
         agg = q.agg
         col = q.agg_col
         by = q.group_by or q.select_cols
+        name = _result_name(q)
 
         if not by:
             if agg.startswith('COUNT'):
-                val = (df[col].count() if col and col != '*' else len(df))
-                return [{agg: float(val * scale)}]
+                val = (df[col].count() if col and col != '*' else len(df)) * scale
             elif agg.startswith('SUM'):
-                val = df[col].sum()
-                return [{f"SUM({col})": float(val * scale)}]
+                val = df[col].sum() * scale
             elif agg.startswith('AVG'):
                 val = df[col].mean()
-                return [{f"AVG({col})": float(val)}]
+            return pd.DataFrame({name: [float(val)]})
 
        
         g = df.groupby(by, dropna=False)
-        rows = []
         if agg.startswith('COUNT'):
-            if col and col != '*':
-                s = g[col].count() * scale
-                for k, v in s.items():
-                    rows.append(_row(by, k) | {agg: float(v)})
-            else:
-                s = g.size() * scale
-                for k, v in s.items():
-                    rows.append(_row(by, k) | {agg: float(v)})
+            s = (g[col].count() if col and col != '*' else g.size()) * scale
         elif agg.startswith('SUM'):
             s = g[col].sum() * scale
-            for k, v in s.items():
-                rows.append(_row(by, k) | {f"SUM({col})": float(v)})
         elif agg.startswith('AVG'):
             s = g[col].mean()
-            for k, v in s.items():
-                rows.append(_row(by, k) | {f"AVG({col})": float(v)})
-        return rows
+        return s.astype("float64").rename(name).reset_index()
+
+    def _order_limit(self, df: pd.DataFrame, q) -> pd.DataFrame:
+        if q.order_by is None:
+            return df if q.limit is None else df.iloc[:q.limit].reset_index(drop=True)
+        col = _resolve_column(df, q.order_by)
+        if q.limit is not None and is_numeric_dtype(df[col]):
+            # partial top-k selection instead of sorting every group
+            pick = df.nlargest if q.order_desc else df.nsmallest
+            return pick(q.limit, col).reset_index(drop=True)
+        out = df.sort_values(col, ascending=not q.order_desc, kind="stable")
+        return out.iloc[:q.limit].reset_index(drop=True)
 
     def _run_exact(self, q):
-        df = load_csv(q.source)
+        df = self._join(load_csv(q.source), q)
         df = self._apply_where(df, q)
-        return self._aggregate(df, q, scale=1.0)
+        return self._order_limit(self._aggregate(df, q, scale=1.0), q)
 
    
     def _needed_columns(self, q) -> list[str] | None:
@@ -127,24 +167,36 @@ class QueryEngine:
        
         if q.where_col:
             cols.add(q.where_col)
+       
+        index = self._join_index(q)
+        if index is not None:
+            # the fact column wins on a name clash, as in DimIndex.probe
+            cols -= set(index.columns) - set(read_columns(q.source))
+            cols.add(q.join_key)
         return list(cols) if cols else None  # None => read all
 
+    def _stream_dtypes(self, q, usecols: list[str] | None) -> dict | None:
+        if not usecols:
+            return None
+        index = self._join_index(q)
+        dtypes = {}
+        for c in usecols:
+            if index is not None and c == q.join_key:
+                dtypes[c] = index.keys.dtype
+            elif c == (q.agg_col or "") and (q.agg.startswith("SUM") or q.agg.startswith("AVG")):
+                dtypes[c] = "float64"
+            elif "id" in c.lower() or "clicked" in c.lower():
+                dtypes[c] = "int64"
+            else:
+                dtypes[c] = "object"
+        return dtypes
+
     def _stream_approx(self, q, p: float, seed: Optional[int], chunksize: int):
         
         rng = np.random.default_rng(seed)
         usecols = self._needed_columns(q)
-
-        
-        dtypes = None
-        if usecols:
-            dtypes = {}
-            for c in usecols:
-                if c == (q.agg_col or "") and (q.agg.startswith("SUM") or q.agg.startswith("AVG")):
-                    dtypes[c] = "float64"
-                elif "id" in c.lower() or "clicked" in c.lower():
-                    dtypes[c] = "int64"
-                else:
-                    dtypes[c] = "object"
+        dtypes = self._stream_dtypes(q, usecols)
+        index = self._join_index(q)
 
         by = q.group_by or q.select_cols
         agg = q.agg
@@ -153,6 +205,7 @@ class QueryEngine:
        
         grouped_counts: dict = {}
         grouped_sums: dict = {}
+        partials: list[pd.DataFrame] = []
 
         for chunk in pd.read_csv(
             q.source,
@@ -163,7 +216,10 @@ class QueryEngine:
             engine="c",
             memory_map=True,
         ):
-            
+            if index is not None:
+                # sample the fact rows first so only the kept ones probe the index
+                chunk = index.probe(chunk.loc[rng.random(len(chunk)) < p], q.join_key)
+
             if q.where_col:
                 val = q.where_val
                 if isinstance(val, str) and len(val) >= 2 and ((val[0] == "'" and val[-1] == "'") or (val[0] == '"' and val[-1] == '"')):
@@ -185,10 +241,13 @@ class QueryEngine:
                 continue
 
          
-            mask = rng.random(len(chunk)) < p
-            if not mask.any():
-                continue
-            samp = chunk.loc[mask]
+            if index is not None:
+                samp = chunk
+            else:
+                mask = rng.random(len(chunk)) < p
+                if not mask.any():
+                    continue
+                samp = chunk.loc[mask]
 
             if not by:
                 if agg.startswith("COUNT"):
@@ -201,58 +260,64 @@ class QueryEngine:
             else:
                 g = samp.groupby(by, dropna=False)
                 if agg.startswith("COUNT"):
-                    s = g.size()
-                    for k, v in s.items():
-                        key = _key_tuple(k)
-                        grouped_counts[key] = grouped_counts.get(key, 0) + int(v)
+                    partials.append(g.size().to_frame("count"))
                 elif agg.startswith("SUM"):
-                    s = g[col].sum()
-                    for k, v in s.items():
-                        key = _key_tuple(k)
-                        grouped_sums[key] = grouped_sums.get(key, 0.0) + float(v)
+                    partials.append(g[col].sum().to_frame("sum"))
                 elif agg.startswith("AVG"):
-                    c = g[col].count()
-                    s = g[col].sum()
-                    for k in s.index:
-                        key = _key_tuple(k)
-                        grouped_sums[key] = grouped_sums.get(key, 0.0) + float(s.loc[k])
-                        grouped_counts[key] = grouped_counts.get(key, 0) + int(c.loc[k])
+                    partials.append(g[col].agg(["sum", "count"]))
+                if len(partials) >= _COMPACT_EVERY:
+                    partials = [_combine_partials(partials, len(by))]
 
        
-        rows = []
         scale = 1.0 / max(p, 1e-12)
+        name = _result_name(q)
 
         if not by:
             if agg.startswith("COUNT"):
-                rows.append({agg: float(grouped_counts.get(None, 0) * scale)})
+                val = grouped_counts.get(None, 0) * scale
             elif agg.startswith("SUM"):
-                rows.append({f"SUM({col})": float(grouped_sums.get(None, 0.0) * scale)})
+                val = grouped_sums.get(None, 0.0) * scale
             elif agg.startswith("AVG"):
                 s = grouped_sums.get(None, 0.0)
                 c = grouped_counts.get(None, 0)
-                rows.append({f"AVG({col})": float(s / c) if c else float("nan")})
-            return rows
+                val = s / c if c else float("nan")
+            return pd.DataFrame({name: [float(val)]})
 
+        if not partials:
+            return pd.DataFrame(columns=[*by, name])
+        acc = _combine_partials(partials, len(by))
         if agg.startswith("COUNT"):
-            for key, cnt in grouped_counts.items():
-                rows.append(_row(by, key) | {agg: float(cnt * scale)})
+            s = acc["count"] * scale
         elif agg.startswith("SUM"):
-            for key, sm in grouped_sums.items():
-                rows.append(_row(by, key) | {f"SUM({col})": float(sm * scale)})
+            s = acc["sum"] * scale
         elif agg.startswith("AVG"):
-            keys = set(grouped_sums) | set(grouped_counts)
-            for key in keys:
-                s = grouped_sums.get(key, 0.0)
-                c = grouped_counts.get(key, 0)
-                rows.append(_row(by, key) | {f"AVG({col})": float(s / c) if c else float("nan")})
-        return rows
+            s = acc["sum"] / acc["count"].where(acc["count"] > 0)
+        return s.astype("float64").rename(name).reset_index()
+
+
 
+# per-chunk group partials are folded together once this many pile up
+_COMPACT_EVERY = 32
 
+def _result_name(q) -> str:
+    if q.agg.startswith('COUNT'):
+        return q.agg
+    if q.agg.startswith('SUM'):
+        return f"SUM({q.agg_col})"
+    return f"AVG({q.agg_col})"
 
-def _row(cols, key):
-    if not isinstance(key, tuple):
-        key = (key,)
-    return {c: k for c, k in zip(cols, key)}
+def _combine_partials(parts: list[pd.DataFrame], nlevels: int) -> pd.DataFrame:
+    return pd.concat(parts).groupby(level=list(range(nlevels)), dropna=False).sum()
+
+def _resolve_column(df: pd.DataFrame, name: str) -> str:
+    norm = lambda c: re.sub(r"\s+", "", str(c)).lower()
+    for c in df.columns:
+        if norm(c) == norm(name):
+            return c
+    raise ValueError(f"ORDER BY column not in result: {name}")
+
+def _materialize(df: pd.DataFrame, as_frame: bool):
+    return df if as_frame else df.to_dict("records")
 
 def _coerce(df: pd.DataFrame, col: str, val: str):
     dt = df[col].dtype
@@ -264,6 +329,3 @@ def _coerce(df: pd.DataFrame, col: str, val: str):
     if isinstance(val, str) and len(val) >= 2 and ((val[0] == "'" and val[-1] == "'") or (val[0] == '"' and val[-1] == '"')):
         return val[1:-1]
     return val
-
-def _key_tuple(k) -> tuple:
-    return k if isinstance(k, tuple) else (k,)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+import os
+from functools import lru_cache
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from .data import load_csv
+
+
+class DimIndex:
+    """Broadcast side of a fact-to-dimension join, loaded once and probed per chunk.
+
+    Keys are kept sorted (binary search) when numeric, otherwise hashed via a
+    pandas Index; string attributes are dictionary-encoded as int32 codes.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str):
+        if key not in df.columns:
+            raise ValueError(f"JOIN key {key!r} not found in dimension table")
+        if df[key].duplicated().any():
+            raise ValueError(f"JOIN key {key!r} is not unique in dimension table")
+        self.key = key
+        self.columns = [c for c in df.columns if c != key]
+
+        keys = df[key]
+        self._sorted = is_numeric_dtype(keys)
+        if self._sorted:
+            order = np.argsort(keys.to_numpy(), kind="stable")
+            df = df.iloc[order]
+            self.keys = df[key].to_numpy()
+            self._hash = None
+        else:
+            self.keys = keys.to_numpy()
+            self._hash = pd.Index(self.keys)
+
+        self._values: Dict[str, np.ndarray] = {}
+        self._uniques: Dict[str, np.ndarray] = {}
+        for c in self.columns:
+            s = df[c]
+            if is_numeric_dtype(s):
+                self._values[c] = s.to_numpy()
+            else:
+                codes, uniques = pd.factorize(s, use_na_sentinel=False)
+                self._values[c] = codes.astype(np.int32)
+                self._uniques[c] = np.asarray(uniques, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys) -> np.ndarray:
+        """Row position in the index for every key, -1 where there is no match."""
+        k = np.asarray(keys)
+        if k.dtype != self.keys.dtype:
+            # missing fact keys never match; the rest must cast losslessly
+            valid = ~pd.isna(k)
+            pos = np.full(len(k), -1, dtype=np.intp)
+            pos[valid] = self._lookup(self._cast(k[valid]))
+            return pos
+        return self._lookup(k)
+
+    def _cast(self, k: np.ndarray) -> np.ndarray:
+        try:
+            if self.keys.dtype == object:
+                return k.astype(str).astype(object)
+            cast = k.astype(self.keys.dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"JOIN key {self.key!r}: cannot cast fact keys from {k.dtype} "
+                             f"to dimension key type {self.keys.dtype}") from e
+        if is_numeric_dtype(k.dtype) and not np.array_equal(cast.astype(k.dtype), k):
+            raise ValueError(f"JOIN key {self.key!r}: fact keys of type {k.dtype} do not fit "
+                             f"dimension key type {self.keys.dtype} without loss")
+        return cast
+
+    def _lookup(self, k: np.ndarray) -> np.ndarray:
+        if self._sorted:
+            if len(self.keys) == 0:
+                return np.full(len(k), -1, dtype=np.intp)
+            pos = np.searchsorted(self.keys, k)
+            pos = np.minimum(pos, len(self.keys) - 1)
+            return np.where(self.keys[pos] == k, pos, -1)
+        if self._hash is None:
+            self._hash = pd.Index(self.keys)
+        return self._hash.get_indexer(k)
+
+    def probe(self, fact: pd.DataFrame, fact_key: str) -> pd.DataFrame:
+        """Inner join: keep matching fact rows and append the dimension columns."""
+        pos = self.lookup(fact[fact_key].to_numpy())
+        hit = pos >= 0
+        out = fact.loc[hit].copy()
+        pos = pos[hit]
+        for c in self.columns:
+            if c in out.columns:
+                continue  # fact column wins on a name clash
+            vals = self._values[c][pos]
+            out[c] = self._uniques[c][vals] if c in self._uniques else vals
+        return out
+
+
+@lru_cache(maxsize=8)
+def _load_index(path: str, key: str, mtime_ns: int, size: int) -> DimIndex:
+    return DimIndex(load_csv(path), key)
+
+
+def dim_index(path: str, key: str) -> DimIndex:
+    # cached per file version, so repeated queries reuse the built index
+    st = os.stat(path)
+    return _load_index(os.path.abspath(path), key, st.st_mtime_ns, st.st_size)
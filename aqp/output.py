@@ -0,0 +1,59 @@
+import json
+import sys
+import pandas as pd
+
+FORMATS = ("json", "ndjson", "csv", "arrow")
+
+# rows serialised per write, so large GROUP BY results never become one big string
+BATCH_ROWS = 65_536
+
+
+def _batches(df: pd.DataFrame, batch_rows: int):
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+def write_ndjson(df: pd.DataFrame, fh, batch_rows: int = BATCH_ROWS) -> None:
+    for part in _batches(df, batch_rows):
+        fh.write("".join(json.dumps(r) + "\n" for r in part.to_dict("records")))
+
+
+def write_csv(df: pd.DataFrame, fh, batch_rows: int = BATCH_ROWS) -> None:
+    if df.empty:
+        df.to_csv(fh, index=False)
+        return
+    for i, part in enumerate(_batches(df, batch_rows)):
+        part.to_csv(fh, index=False, header=(i == 0))
+
+
+def write_arrow(df: pd.DataFrame, fh, batch_rows: int = BATCH_ROWS) -> None:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(fh, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+
+
+def write_result(df: pd.DataFrame, fmt: str, path: str | None = None) -> None:
+    # "json" is the CLI's pretty-printed envelope and is not handled here
+    if fmt not in ("ndjson", "csv", "arrow"):
+        raise ValueError(f"Unsupported streaming format: {fmt}")
+    binary = fmt == "arrow"
+    if path is None or path == "-":
+        fh = sys.stdout.buffer if binary else sys.stdout
+        _dispatch(df, fmt, fh)
+        fh.flush()
+        return
+    kwargs = {} if binary else {"newline": "", "encoding": "utf-8"}
+    with open(path, "wb" if binary else "w", **kwargs) as fh:
+        _dispatch(df, fmt, fh)
+
+
+def _dispatch(df: pd.DataFrame, fmt: str, fh) -> None:
+    if fmt == "ndjson":
+        write_ndjson(df, fh)
+    elif fmt == "csv":
+        write_csv(df, fh)
+    else:
+        write_arrow(df, fh)
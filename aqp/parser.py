@@ -14,12 +14,17 @@ class ParsedQuery:
     where_op: Optional[str]
     where_val: Optional[str]
     group_by: List[str]
+    order_by: Optional[str] = None
+    order_desc: bool = False
+    limit: Optional[int] = None
+    join_source: Optional[str] = None
+    join_key: Optional[str] = None
 
 def parse(sql: str) -> ParsedQuery:
    
     s = re.sub(r"\s+", " ", sql.strip())
     
-    m = re.match(rf"SELECT (?P<select>.+?) FROM (?P<src>[^ ]+)(?: WHERE (?P<wcol>[^ ]+) (?P<wop>=|!=|>|<|>=|<=) (?P<wval>[^ ]+))?(?: GROUP BY (?P<gby>.+))?;?\Z", s, re.IGNORECASE)
+    m = re.match(rf"SELECT (?P<select>.+?) FROM (?P<src>[^ ]+)(?: JOIN (?P<jsrc>[^ ]+) ON (?P<jkey>[^ ]+))?(?: WHERE (?P<wcol>[^ ]+) (?P<wop>=|!=|>|<|>=|<=) (?P<wval>[^ ]+))?(?: GROUP BY (?P<gby>.+?))?(?: ORDER BY (?P<oby>.+?)(?: (?P<odir>ASC|DESC))?)?(?: LIMIT (?P<limit>\d+))?;?\Z", s, re.IGNORECASE)
     if not m:
         raise ValueError("Unsupported SQL. Examples: SELECT COUNT(*) FROM file.csv; SELECT city, SUM(amount) FROM file.csv GROUP BY city")
     select = m.group('select').strip()
@@ -29,6 +34,11 @@ def parse(sql: str) -> ParsedQuery:
     wval = m.group('wval')
     gby  = m.group('gby')
     group_by = [c.strip() for c in gby.split(',')] if gby else []
+    oby  = m.group('oby')
+    odir = m.group('odir')
+    limit = m.group('limit')
+    jsrc = m.group('jsrc')
+    jkey = m.group('jkey')
 
     
     parts = [p.strip() for p in select.split(',')]
@@ -56,5 +66,10 @@ def parse(sql: str) -> ParsedQuery:
         where_col=wcol,
         where_op=wop,
         where_val=wval,
-        group_by=group_by
+        group_by=group_by,
+        order_by=oby.strip() if oby else None,
+        order_desc=bool(odir) and odir.upper() == 'DESC',
+        limit=int(limit) if limit else None,
+        join_source=jsrc.strip() if jsrc else None,
+        join_key=jkey.strip() if jkey else None
     )
@@ -49,8 +49,14 @@ else:
 default_query = "SELECT city, SUM(amount) FROM uploaded.csv GROUP BY city"
 sql = st.text_area("SQL-like query:", value=default_query, height=100)
 
-method = st.selectbox("Approximation method", ["sample", "stream", "exact"], index=1)
+method = st.selectbox("Approximation method", ["sample", "stream", "exact", "auto"], index=1)
 rate = st.slider("Sample rate (for 'sample' or 'stream')", 0.01, 1.0, 0.1, 0.01)
+if method == "auto":
+    st.caption("'auto' draws a small pilot sample and picks the method and rate for you.")
+    latency_budget = st.number_input("Latency budget (sec, 0 = none)", value=0.0, min_value=0.0, step=0.5)
+    error_target = st.number_input("Error target (mean relative error, 0 = none)", value=0.01, min_value=0.0, step=0.005, format="%.3f")
+else:
+    latency_budget, error_target = 0.0, 0.0
 seed = st.number_input("Seed", value=42, step=1)
 show_exact = st.checkbox("Also compute exact for comparison", value=False)  # default off for timing fairness
 
@@ -68,15 +74,23 @@ def normalize_sql_from(sql_text: str, path: str | None) -> str:
 if st.button("Run"):
     if not selected_path:
         st.error("Please upload a file or provide a valid local path.")
+    elif method == "auto" and not (latency_budget or error_target):
+        st.error("'auto' needs a latency budget and/or an error target greater than 0.")
     else:
         
         sql_norm = normalize_sql_from(sql, selected_path)
 
         eng = QueryEngine()
         t0 = time.time()
-        out = eng.run(sql_norm, method=method, sample_rate=rate, seed=int(seed), return_exact=show_exact)
+        out = eng.run(sql_norm, method=method, sample_rate=rate, seed=int(seed), return_exact=show_exact,
+                      latency_budget=latency_budget or None, error_target=error_target or None)
         t1 = time.time()
 
+        if "advice" in out:
+            adv = out["advice"]
+            st.info(f"Advisor picked '{adv['method']}' at rate {adv['sample_rate']:.4f} "
+                    f"(est. {adv['est_time_sec']:.2f}s, est. error {adv['est_rel_error']:.4f})")
+
         st.subheader("Approximate Result")
         st.code(out, language="json")
         st.caption(f"Ran in {out['time_sec']:.3f}s (engine), {t1-t0:.3f}s (UI total)")
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from aqp.engine import QueryEngine
+
+
+def test_stream_join_on_numeric_key_without_id_in_name(tmp_path):
+    # "store" is not matched by the name-based dtype guess; stream must still join on it
+    rng = np.random.default_rng(0)
+    n = 20_000
+    fact = tmp_path / "fact.csv"
+    stores = tmp_path / "stores.csv"
+    pd.DataFrame({"store": rng.integers(1, 50, n), "city": rng.choice(["A", "B"], n),
+                  "amount": rng.random(n)}).to_csv(fact, index=False)
+    pd.DataFrame({"store": np.arange(1, 50), "region": rng.integers(1, 4, 49)}).to_csv(stores, index=False)
+
+    eng = QueryEngine()
+    for sql in [
+        f"SELECT region, SUM(amount) FROM {fact} JOIN {stores} ON store GROUP BY region ORDER BY region",
+        f"SELECT city, COUNT(*) FROM {fact} JOIN {stores} ON store WHERE region = 2 GROUP BY city ORDER BY city",
+    ]:
+        exact = eng.run(sql, method="exact", as_frame=True)["result"]
+        stream = eng.run(sql, method="stream", sample_rate=1.0, streaming_chunksize=3_000, as_frame=True)["result"]
+        assert len(exact) > 0
+        pd.testing.assert_frame_equal(stream, exact, check_dtype=False)